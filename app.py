@@ -17,7 +17,9 @@
 """A command line interface to gather and pre-preprocess symbols available in TensorFlow API."""
 
 from collections import deque
-from typing import Optional
+from pathlib import Path
+from types import ModuleType
+from typing import Any
 import daiquiri
 import json
 import logging
@@ -26,11 +28,24 @@ import sys
 
 import click
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 
 daiquiri.setup(level=logging.INFO)
 _LOGGER = daiquiri.getLogger(__name__)
 
 
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize the given object to an indented UTF-8 JSON document, prefer orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+
+
 @click.group()
 def cli() -> None:
     """Extract and manipulate with TensorFlow API."""
@@ -45,30 +60,32 @@ def gather() -> None:
     queue = deque([tf._api.v2, tf_v2])
 
     result = set()
-    modules_seen = set()
+    # Mark modules as seen when enqueued so that the same module is never processed twice.
+    modules_seen = {tf._api.v2.__name__, tf_v2.__name__}
     while queue:
         module = queue.pop()
-
-        modules_seen.add(module.__name__)
+        m = module.__name__.replace("tensorflow._api.v2", "tensorflow")
 
         for item in dir(module):
             obj = getattr(module, item)
-            if isinstance(obj, tf.__class__):
-                if obj.__name__ not in modules_seen and obj.__name__.startswith("tensorflow._api.v2."):
+            if isinstance(obj, ModuleType):
+                obj_name = obj.__name__
+                if obj_name.startswith("tensorflow._api.v2.") and obj_name not in modules_seen:
+                    modules_seen.add(obj_name)
                     queue.append(obj)
             else:
-                m = module.__name__.replace("tensorflow._api.v2", "tensorflow")
                 result.add(f"{m}.{item}")
 
-                if str(item) == "__all__":
+                if item == "__all__":
                     try:
-                        for sym in getattr(module, item) or []:
+                        for sym in obj or []:
                             result.add(f"{m}.{sym}")
                     except Exception:
                         _LOGGER.exception("Failed to obtain symbols exported by __all__, skipping the error")
 
-    with open(f"data/{tf.__version__}.json", "w") as f:
-        json.dump(sorted(list(result)), f, indent=2)
+    os.makedirs("data", exist_ok=True)
+    with open(os.path.join("data", f"{tf.__version__}.json"), "wb") as f:
+        f.write(_json_dumps(sorted(result)))
 
 
 @cli.command()
@@ -91,27 +108,38 @@ def gather() -> None:
 )
 def merge(path: str, no_patch: bool) -> None:
     """Merge multiple API data files into one."""
-    result = {}
-    for f in os.listdir(path):
-        file_path = os.path.join(path, f)
-        if not os.path.isfile(file_path) or not file_path.endswith(".json"):
-            _LOGGER.debug("Skipping file %r", f)
-            continue
-
-        key = os.path.basename(f).rsplit(".", maxsplit=1)[0]
-        if no_patch:
-            # We rely on semver as used by TensorFlow packages.
-            key = key.rsplit(".", maxsplit=1)[0]
-
-        if key in result:
-            # No additional clever logic is done.
-            _LOGGER.warning("Multiple versions for %r detected", key)
-            continue
-
-        with open(file_path, "r") as input_file:
-            result[key] = json.load(input_file)
-
-    json.dump(result, sys.stdout, indent=2)
+    files = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                _LOGGER.debug("Skipping file %r", entry.name)
+                continue
+
+            key = entry.name.rsplit(".", maxsplit=1)[0]
+            if no_patch:
+                # We rely on semver as used by TensorFlow packages.
+                key = key.rsplit(".", maxsplit=1)[0]
+
+            if key in files:
+                # No additional clever logic is done.
+                _LOGGER.warning("Multiple versions for %r detected", key)
+                continue
+
+            files[key] = entry.path
+
+    # Parse and serialize one version at a time, nothing is written until all the data files are valid.
+    chunks = []
+    for key in sorted(files):
+        try:
+            symbols = json.loads(Path(files[key]).read_bytes())
+            if not isinstance(symbols, list):
+                raise ValueError("expected a JSON list of symbols")
+        except ValueError as exc:
+            raise click.ClickException(f"Invalid data file {files[key]!r}: {exc}") from exc
+
+        chunks.append(b"\n  " + json.dumps(key).encode() + b": " + _json_dumps(symbols).replace(b"\n", b"\n  "))
+
+    sys.stdout.buffer.write(b"{" + b",".join(chunks) + (b"\n}\n" if chunks else b"}\n"))
 
 
 __name__ == "__main__" and cli()